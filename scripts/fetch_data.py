@@ -7,26 +7,42 @@ Source: s3://impermanent-benchmark/v0.1.0/gh-archive/evaluations/evaluation_resu
 Outputs: data/leaderboard.json
 """
 
-import json
+import io
+import math
 import os
 import sys
-import tempfile
 from datetime import datetime, timedelta
 
 import boto3
+import numpy as np
+import orjson
 import pandas as pd
+import pyarrow.parquet as pq
+from botocore.config import Config
 
 S3_BUCKET = "impermanent-benchmark"
 S3_KEY = "v0.1.0/gh-archive/evaluations/evaluation_results.parquet"
+S3_CONFIG = Config(retries={"max_attempts": 5, "mode": "standard"})
+
+# Only these columns are used downstream; sparsity_level may be absent.
+PARQUET_COLUMNS = [
+    "subdataset", "frequency", "sparsity_level", "cutoff", "metric", "model_alias", "value",
+]
 
 
 def fetch_parquet():
     """Download parquet from S3 and return a DataFrame."""
     print(f"Fetching s3://{S3_BUCKET}/{S3_KEY} ...")
-    s3 = boto3.client("s3")
-    with tempfile.NamedTemporaryFile(suffix=".parquet") as tmp:
-        s3.download_file(S3_BUCKET, S3_KEY, tmp.name)
-        df = pd.read_parquet(tmp.name)
+    s3 = boto3.client("s3", config=S3_CONFIG)
+    # Read the object body straight into memory instead of round-tripping
+    # through a temp file on disk.
+    body = s3.get_object(Bucket=S3_BUCKET, Key=S3_KEY)["Body"]
+    buf = io.BytesIO(body.read())
+    available = set(pq.read_schema(buf).names)
+    buf.seek(0)
+    # Project only the columns used downstream; every metric is kept so that
+    # models reported under other metrics still appear in the leaderboard
+    df = pd.read_parquet(buf, columns=[c for c in PARQUET_COLUMNS if c in available])
     print(f"  {len(df)} rows, {len(df.columns)} columns")
     return df
 
@@ -48,69 +64,87 @@ def ensure_sparsity_level(df):
     return out
 
 
-def build_records(df, metric_name):
-    """Convert rows for a given metric into the leaderboard record format."""
-    subset = df[df["metric"] == metric_name]
+GROUP_COLS = ["subdataset", "frequency", "sparsity_level", "cutoff"]
+
+
+def build_table(df, metric_name):
+    """Pivot rows for a given metric into one row per group and one column per model.
+
+    Returns the value table plus a boolean mask of which (group, model) cells were
+    reported at all, so a reported NaN (null) can be told apart from a missing model.
+    """
+    # groupby-style semantics: rows with a null group key are dropped
+    subset = df[df["metric"] == metric_name].dropna(subset=GROUP_COLS)
+    value = subset["value"].mask(subset["value"].abs() >= 1e6, 0)
+    # Python's round() on each value, not Series.round(), which scales and
+    # rounds half-to-even and so disagrees near half-way values (0.0025 → 0.002)
+    subset = subset.assign(value=value.map(lambda v: v if pd.isna(v) else round(v, 3)))
+
+    keyed = (
+        subset.drop_duplicates(GROUP_COLS + ["model_alias"], keep="last")
+        .set_index(GROUP_COLS + ["model_alias"])["value"]
+    )
+    table = keyed.unstack("model_alias").sort_index()
+    reported = pd.Series(True, index=keyed.index).unstack("model_alias", fill_value=False)
+    return table, reported.reindex_like(table)
+
+
+def table_to_records(table, reported):
+    """Expand a metric table into the leaderboard record format."""
+    columns = table.columns.tolist()
     records = []
-    group_cols = ["subdataset", "frequency", "sparsity_level", "cutoff"]
-
-    for (sub, freq, sparsity, cut), grp in subset.groupby(group_cols):
-        values = {}
-        for _, row in grp.iterrows():
-            v = row["value"]
-            if pd.isna(v) or abs(v) >= 1e6:
-                values[row["model_alias"]] = None if pd.isna(v) else 0
-            else:
-                values[row["model_alias"]] = round(v, 3)
+    for (sub, freq, sparsity, cut), row, seen in zip(
+        table.index, table.to_numpy().tolist(), reported.to_numpy().tolist()
+    ):
         records.append({
             "subdataset": sub,
             "frequency": freq,
             "sparsity_level": sparsity,
             "cutoff": cut,
-            "values": values,
+            "values": {
+                m: None if math.isnan(v) else v
+                for m, v, ok in zip(columns, row, seen)
+                if ok
+            },
         })
-
-    records.sort(
-        key=lambda e: (e["subdataset"], e["frequency"], e["sparsity_level"], e["cutoff"])
-    )
     return records
 
 
-def compute_summary(mase_records, crps_records, models):
+def compute_summary(mase_table, crps_table, models):
     """Compute summary stats: average metric and average rank per model."""
 
-    def avg_metric_and_rank(records, models):
-        model_vals = {m: [] for m in models}
-        for r in records:
-            for m in models:
-                v = r["values"].get(m)
-                if v is not None:
-                    model_vals[m].append(v)
+    def avg_metric_and_rank(table, models):
+        # (groups x models) matrix; missing or null values are NaN
+        # Own a C-ordered copy: it is modified in place below, and summing a
+        # C-ordered array over axis 0 adds rows one at a time, matching the
+        # left-to-right order of a plain Python sum (to_numpy is usually
+        # Fortran-ordered, where NumPy would use pairwise summation instead).
+        arr = np.array(table.reindex(columns=models).to_numpy(), dtype=np.float64, order="C")
+        missing = np.isnan(arr)
+        counts = len(arr) - missing.sum(axis=0)
+
+        # Rank within each row, lower is better; the stable sort keeps ties in
+        # model order and pushes NaN to the end so present values rank 1..k.
+        # The rank and value buffers are then zeroed and summed in place.
+        ranks = np.argsort(np.argsort(arr, axis=1, kind="stable"), axis=1, kind="stable")
+        ranks += 1
+        ranks[missing] = 0
+        rank_sums = ranks.sum(axis=0)
+
+        arr[missing] = 0.0
+        sums = arr.sum(axis=0)
 
         avg_metric = {}
-        for m in models:
-            vals = model_vals[m]
-            avg_metric[m] = sum(vals) / len(vals) if vals else None
-
-        rank_accum = {m: 0 for m in models}
-        rank_count = {m: 0 for m in models}
-
-        for r in records:
-            vals = [(m, r["values"].get(m)) for m in models]
-            vals = [(m, v) for m, v in vals if v is not None]
-            vals.sort(key=lambda x: x[1])
-            for rank_idx, (m, _) in enumerate(vals):
-                rank_accum[m] += rank_idx + 1
-                rank_count[m] += 1
-
         avg_rank = {}
-        for m in models:
-            avg_rank[m] = rank_accum[m] / rank_count[m] if rank_count[m] > 0 else None
+        for i, m in enumerate(models):
+            n = int(counts[i])
+            avg_metric[m] = float(sums[i]) / n if n else None
+            avg_rank[m] = int(rank_sums[i]) / n if n else None
 
         return avg_metric, avg_rank
 
-    mase_avg, mase_rank = avg_metric_and_rank(mase_records, models)
-    crps_avg, crps_rank = avg_metric_and_rank(crps_records, models)
+    mase_avg, mase_rank = avg_metric_and_rank(mase_table, models)
+    crps_avg, crps_rank = avg_metric_and_rank(crps_table, models)
 
     summary = []
     for m in models:
@@ -160,27 +194,30 @@ def main():
     # Filter to last 3 months
     all_cutoffs = sorted(df["cutoff"].unique().tolist())
     if all_cutoffs:
-        latest_parts = all_cutoffs[-1].split("-")
-        latest_date = datetime(int(latest_parts[0]), int(latest_parts[1]), int(latest_parts[2]))
-        cutoff_threshold = latest_date - timedelta(days=90)
-
-        def is_within_3_months(cutoff_str):
+        def cutoff_date(cutoff_str):
             parts = cutoff_str.split("-")
-            return datetime(int(parts[0]), int(parts[1]), int(parts[2])) >= cutoff_threshold
+            return datetime(int(parts[0]), int(parts[1]), int(parts[2]))
+
+        cutoff_threshold = cutoff_date(all_cutoffs[-1]) - timedelta(days=90)
+
+        # Parse each distinct cutoff once, then filter rows by set membership
+        accepted = {c for c in all_cutoffs if cutoff_date(c) >= cutoff_threshold}
 
         before = len(df)
-        df = df[df["cutoff"].apply(is_within_3_months)]
+        df = df[df["cutoff"].isin(accepted)]
         print(f"  Filtered to last 3 months (since {cutoff_threshold.strftime('%Y-%m-%d')}): {before} → {len(df)} rows")
 
-    # Build records
-    mase_records = build_records(df, "mase")
-    crps_records = build_records(df, "scaled_crps")
-
-    # Extract dimensions from filtered data
-    all_records = mase_records + crps_records
-    cutoffs = sorted(set(r["cutoff"] for r in all_records))
-    subdatasets = sorted(set(r["subdataset"] for r in all_records))
-    frequencies = sorted(set(r["frequency"] for r in all_records))
+    # Build per-metric tables, then the JSON records from them
+    mase_table, mase_reported = build_table(df, "mase")
+    crps_table, crps_reported = build_table(df, "scaled_crps")
+    mase_records = table_to_records(mase_table, mase_reported)
+    crps_records = table_to_records(crps_table, crps_reported)
+
+    # Extract dimensions from the tables' group keys rather than the records
+    group_keys = mase_table.index.append(crps_table.index)
+    cutoffs = sorted(group_keys.unique(level="cutoff"))
+    subdatasets = sorted(group_keys.unique(level="subdataset"))
+    frequencies = sorted(group_keys.unique(level="frequency"))
     def ordered_sparsity_levels(levels: set) -> list:
         preferred = ["low", "medium", "high"]
         as_set = {str(x) for x in levels}
@@ -188,11 +225,9 @@ def main():
         out.extend(sorted(as_set - set(out)))
         return out
 
-    sparsity_levels = ordered_sparsity_levels(
-        {r["sparsity_level"] for r in all_records}
-    )
+    sparsity_levels = ordered_sparsity_levels(set(group_keys.unique(level="sparsity_level")))
 
-    summary = compute_summary(mase_records, crps_records, models)
+    summary = compute_summary(mase_table, crps_table, models)
 
     data = {
         "models": models,
@@ -205,8 +240,8 @@ def main():
         "summary": summary,
     }
 
-    with open(output_path, "w") as f:
-        json.dump(data, f, separators=(",", ":"))
+    with open(output_path, "wb") as f:
+        f.write(orjson.dumps(data))
 
     file_size = os.path.getsize(output_path)
     print(f"\nSaved to {output_path} ({file_size:,} bytes)")
@@ -7,10 +7,11 @@ Reads:  data/leaderboard.json
 Writes: index.html
 """
 
-import json
 import os
 import sys
 
+import orjson
+
 
 def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -25,30 +26,37 @@ def main():
         print(f"ERROR: Data file not found: {data_path}", file=sys.stderr)
         sys.exit(1)
 
-    with open(data_path, "r") as f:
-        data = json.load(f)
+    # fetch_data.py already writes compact JSON, so embed it as-is rather than
+    # re-serializing; parse only to fail early on a corrupt file
+    with open(data_path, "rb") as f:
+        data_json = f.read()
+
+    try:
+        orjson.loads(data_json)
+    except orjson.JSONDecodeError as e:
+        print(f"ERROR: Invalid JSON in {data_path}: {e}", file=sys.stderr)
+        sys.exit(1)
 
     # Read template
     if not os.path.exists(template_path):
         print(f"ERROR: Template not found: {template_path}", file=sys.stderr)
         sys.exit(1)
 
-    with open(template_path, "r") as f:
+    # Work on bytes throughout so the HTML is never decoded and re-encoded
+    with open(template_path, "rb") as f:
         template = f.read()
 
     # Inject data — replace placeholder with the DATA object
-    # Use compact JSON (no extra whitespace) to keep file size small
-    data_json = json.dumps(data, separators=(",", ":"))
-    data_line = f"const DATA = {data_json};"
+    data_line = b"const DATA = " + data_json + b";"
 
-    if "/* __DATA_PLACEHOLDER__ */" not in template:
+    if b"/* __DATA_PLACEHOLDER__ */" not in template:
         print("ERROR: Placeholder '/* __DATA_PLACEHOLDER__ */' not found in template", file=sys.stderr)
         sys.exit(1)
 
-    html = template.replace("/* __DATA_PLACEHOLDER__ */", data_line)
+    html = template.replace(b"/* __DATA_PLACEHOLDER__ */", data_line)
 
     # Write output
-    with open(output_path, "w") as f:
+    with open(output_path, "wb") as f:
         f.write(html)
 
     file_size = os.path.getsize(output_path)